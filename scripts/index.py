@@ -4,97 +4,309 @@ Unibase AIP Skill — CLI only.
 
 Usage: python scripts/index.py <tool> [params...]
   call_agent "<agent_handle>" "<objective>"
-  stream_agent "<agent_handle>" "<objective>"
+  stream_agent "<agent_handle>" "<objective>" [--collect]
   auto_route "<objective>"
   health_check
-  list_agents [limit] [offset]
+  list_agents [limit] [offset] [--ndjson]
   get_agent_info "<agent_id>"
-  list_runs [limit] [offset]
+  list_runs [limit] [offset] [--ndjson]
   get_run_details "<run_id>"
   get_agent_price "<agent_id>"
-  list_agent_prices [limit] [offset]
+  list_agent_prices [limit] [offset] [--ndjson]
   register_agent "<agent_config_json>"
   unregister_agent "<agent_id>"
   register_user [email]
-  list_users [limit] [offset]
+  list_users [limit] [offset] [--ndjson]
 
-Requires env (or .env): AIP_ENDPOINT, USER_WALLET_ADDRESS, MEMBASE_ACCOUNT (optional), MEMBASE_SECRET_KEY (optional)
+Requires env (or .env): AIP_ENDPOINT, USER_WALLET_ADDRESS, MEMBASE_ACCOUNT (optional), MEMBASE_SECRET_KEY (optional),
+AIP_TIMEOUT (optional, seconds per SDK call, default 30),
+AIP_STREAM_TIMEOUT (optional, seconds per stream_agent event, default 60)
 Output: single JSON value to stdout. On error: {"error":"message"} and exit 1.
+With --ndjson, list tools write one JSON object per item, then a trailing
+{"total", "limit", "offset"} line. stream_agent writes one JSON object per
+event as it arrives, then a final {"events": count} line (or a single array
+with --collect).
 """
 
 import asyncio
+import dataclasses
+import datetime
+import enum
+import functools
+import importlib.util
 import json
+import math
+import operator
 import os
 import sys
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from importlib.machinery import PathFinder
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Union
 
-# Add parent directory to path to import aip_sdk
 parent_dir = Path(__file__).parent.parent
-sys.path.insert(0, str(parent_dir))
 
-try:
+# Seconds to wait for an agent run
+_RUN_TIMEOUT = 60.0
+
+# Default seconds to wait for each event of a streamed run (override with
+# AIP_STREAM_TIMEOUT)
+_DEFAULT_STREAM_TIMEOUT = 60.0
+
+# Default seconds to wait for any other SDK call (override with AIP_TIMEOUT)
+_DEFAULT_TIMEOUT = 30.0
+
+
+def _load_client():
+    """Import the SDK on first use so usage errors never pay for it."""
+    if importlib.util.find_spec("aip_sdk") is None:
+        # If aip_sdk is not installed, look for it at the repo root or in the
+        # cloned SDK, and only add the directory that actually has it
+        for path in (parent_dir, parent_dir / "unibase-aip-sdk"):
+            if PathFinder.find_spec("aip_sdk", [str(path)]) is not None:
+                sys.path.insert(0, str(path))
+                break
+        else:
+            cli_err("aip_sdk not found. Please install with: pip install -e . or clone the SDK")
+
     from aip_sdk import AsyncAIPClient
-except ImportError:
-    # If aip_sdk is not installed, try to use the cloned SDK
-    sdk_path = parent_dir / "unibase-aip-sdk"
-    if sdk_path.exists():
-        sys.path.insert(0, str(sdk_path))
-        from aip_sdk import AsyncAIPClient
-    else:
-        print(json.dumps({"error": "aip_sdk not found. Please install with: pip install -e . or clone the SDK"}))
-        sys.exit(1)
+
+    return AsyncAIPClient
+
+
+@functools.lru_cache(maxsize=1)
+def _orjson() -> Any:
+    """Import orjson on first output, or return None if it isn't installed."""
+    try:
+        import orjson
+    except ImportError:
+        # orjson is an optional speedup; fall back to the stdlib encoder
+        return None
+    return orjson
+
+
+def _json_default(obj: Any) -> Any:
+    """Encode the non-JSON types orjson supports natively, the way it does."""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(data: Any) -> Any:
+    """Replace NaN and infinities with None, as orjson writes them as null."""
+    if isinstance(data, float):
+        return data if math.isfinite(data) else None
+    if isinstance(data, dict):
+        return {key: _finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_finite(value) for value in data]
+    return data
+
+
+def _dumps(data: Any) -> bytes:
+    """Serialize data to a newline-terminated UTF-8 JSON line."""
+    orjson = _orjson()
+    if orjson is not None:
+        try:
+            # orjson emits UTF-8 bytes directly, same as ensure_ascii=False
+            return orjson.dumps(
+                data, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError:
+            # e.g. ints wider than 64 bits; the stdlib encoder handles them
+            pass
+    return _stdlib_dumps(data)
+
+
+def _stdlib_dumps(data: Any) -> bytes:
+    """Serialize data with the stdlib encoder, producing orjson's output."""
+    # Compact separators and the same type handling as orjson, so the output
+    # does not depend on whether it is installed
+    kwargs = {"ensure_ascii": False, "separators": (",", ":"), "default": _json_default}
+    try:
+        text = json.dumps(data, allow_nan=False, **kwargs)
+    except ValueError:
+        text = json.dumps(_finite(data), **kwargs)
+    return (text + "\n").encode()
+
+
+def _write(buf: bytes) -> None:
+    """Write already-encoded output to stdout."""
+    stream = sys.stdout
+    try:
+        fd = stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        # No real descriptor (redirect_stdout, test capture, embedding host)
+        stream.write(buf.decode())
+        return
+
+    # Anything already printed through sys.stdout must come out first
+    stream.flush()
+
+    if stream.isatty():
+        stream.buffer.write(buf)
+        stream.buffer.flush()
+        return
+
+    # Pipes and files: bypass TextIOWrapper and write the bytes straight to
+    # the descriptor. os.write may be partial, so loop until it is all out.
+    view = memoryview(buf)
+    while view:
+        view = view[os.write(fd, view):]
 
 
 def out(data: Any) -> None:
     """Output JSON to stdout."""
-    print(json.dumps(data, ensure_ascii=False))
+    _write(_dumps(data))
 
 
-def cli_err(message: str) -> None:
+def out_lines(items: Iterable[Any]) -> None:
+    """Output one JSON line per item as it is encoded, flushing once at the end."""
+    stream = sys.stdout
+    buffer = getattr(stream, "buffer", None)
+    if buffer is None:
+        for item in items:
+            stream.write(_dumps(item).decode())
+        return
+
+    stream.flush()
+    for item in items:
+        buffer.write(_dumps(item))
+    buffer.flush()
+
+
+def cli_err(message: str, **extra: Any) -> None:
     """Output error JSON and exit."""
-    out({"error": message})
+    # Error payloads are small; skip importing orjson on usage-error paths
+    _write(_stdlib_dumps({"error": message, **extra}))
     sys.exit(1)
 
 
-def get_config() -> Dict[str, str]:
-    """Get configuration from environment variables."""
+class Config(NamedTuple):
+    """Resolved CLI configuration."""
+
+    aip_endpoint: str
+    user_wallet: str
+    user_id: str
+    membase_account: Optional[str]
+    membase_secret_key: Optional[str]
+    timeout: float
+    stream_timeout: float
+
+
+def _env_seconds(name: str, default: float) -> float:
+    """Read a positive, finite number of seconds from the environment."""
+    try:
+        seconds = float(os.environ.get(name, default))
+    except ValueError:
+        seconds = math.nan
+    if not (math.isfinite(seconds) and seconds > 0):
+        cli_err(f"Invalid {name}: {os.environ[name]} (expected seconds > 0)")
+    return seconds
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config() -> Config:
+    """Load configuration from environment variables, once per process."""
     # Try to load .env file if it exists
     env_file = parent_dir / ".env"
     if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    if "=" in line:
-                        key, value = line.split("=", 1)
-                        os.environ.setdefault(key.strip(), value.strip())
-
-    aip_endpoint = os.environ.get("AIP_ENDPOINT", "http://api.aip.unibase.com")
+        for line in env_file.read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#") and "=" in line:
+                key, value = line.split("=", 1)
+                os.environ.setdefault(key.strip(), value.strip())
+
     user_wallet = os.environ.get("USER_WALLET_ADDRESS")
 
     if not user_wallet:
         cli_err("Missing env: set USER_WALLET_ADDRESS")
 
+    return Config(
+        aip_endpoint=os.environ.get("AIP_ENDPOINT", "http://api.aip.unibase.com"),
+        user_wallet=user_wallet,
+        user_id=f"user:{user_wallet}",
+        membase_account=os.environ.get("MEMBASE_ACCOUNT"),
+        membase_secret_key=os.environ.get("MEMBASE_SECRET_KEY"),
+        timeout=_env_seconds("AIP_TIMEOUT", _DEFAULT_TIMEOUT),
+        stream_timeout=_env_seconds("AIP_STREAM_TIMEOUT", _DEFAULT_STREAM_TIMEOUT),
+    )
+
+
+async def _bounded(config: Config, aw: Awaitable[Any]) -> Any:
+    """Await an SDK call, giving up after the configured timeout."""
+    try:
+        return await asyncio.wait_for(aw, timeout=config.timeout)
+    except asyncio.TimeoutError:
+        raise asyncio.TimeoutError(f"timeout after {config.timeout:g}s") from None
+
+
+@asynccontextmanager
+async def _open_client(config: Config) -> AsyncIterator[Any]:
+    """Open an SDK client for the configured endpoint, closing it on exit."""
+    AsyncAIPClient = _load_client()
+    async with AsyncExitStack() as stack:
+        client = AsyncAIPClient(base_url=config.aip_endpoint)
+        # Connecting is bounded by the same timeout as the calls themselves
+        entered = await _bounded(config, client.__aenter__())
+        stack.push_async_exit(client)
+        yield entered
+
+
+# Output keys and the SDK attributes they are read from, for list payloads
+_AGENT_KEYS = (
+    "agent_id",
+    "handle",
+    "name",
+    "description",
+    "price",
+    "capabilities",
+    "on_chain",
+    "identity_address",
+)
+_agent_attrs = operator.attrgetter(*_AGENT_KEYS)
+
+_PRICE_KEYS = ("agent_id", "amount", "currency", "metadata")
+_price_attrs = operator.attrgetter("identifier", "amount", "currency", "metadata")
+
+_USER_KEYS = ("user_id", "wallet_address", "email", "created_at")
+_user_attrs = operator.attrgetter(*_USER_KEYS)
+
+
+def _rows(keys: tuple, attrs: operator.attrgetter, items: Any) -> List[Dict[str, Any]]:
+    """Project SDK objects to plain dicts in a single pass."""
+    return [dict(zip(keys, attrs(item))) for item in items]
+
+
+def _emit_rows(keys: tuple, attrs: operator.attrgetter, items: Any) -> None:
+    """Write one NDJSON line per projected SDK object."""
+    out_lines(dict(zip(keys, attrs(item))) for item in items)
+
+
+def _page(response: Any) -> Dict[str, Any]:
+    """Pagination envelope of a list response."""
     return {
-        "aip_endpoint": aip_endpoint,
-        "user_wallet": user_wallet,
-        "membase_account": os.environ.get("MEMBASE_ACCOUNT"),
-        "membase_secret_key": os.environ.get("MEMBASE_SECRET_KEY"),
+        "total": response.total,
+        "limit": response.limit,
+        "offset": response.offset,
     }
 
 
-async def call_agent(agent_handle: str, objective: str) -> Dict[str, Any]:
+async def call_agent(config: Config, agent_handle: str, objective: str) -> Dict[str, Any]:
     """Call a specific agent with an objective."""
-    config = get_config()
-    user_id = f"user:{config['user_wallet']}"
-
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
+    async with _open_client(config) as client:
         result = await client.run(
             objective=objective,
             agent=agent_handle,
-            user_id=user_id,
-            timeout=60.0,
+            user_id=config.user_id,
+            timeout=_RUN_TIMEOUT,
         )
 
         return {
@@ -106,42 +318,70 @@ async def call_agent(agent_handle: str, objective: str) -> Dict[str, Any]:
         }
 
 
-async def stream_agent(agent_handle: str, objective: str) -> List[Dict[str, Any]]:
-    """Call an agent and stream real-time events."""
-    config = get_config()
-    user_id = f"user:{config['user_wallet']}"
+async def stream_agent(
+    config: Config, agent_handle: str, objective: str, collect: bool = False
+) -> Union[List[Dict[str, Any]], Dict[str, int]]:
+    """Call an agent and stream real-time events.
 
+    Each event is written as an NDJSON line as soon as it arrives, and the
+    returned {"events": count} becomes the final line, so a run with no
+    events still prints something. With collect=True the events are
+    buffered and returned as one array instead.
+    """
     events = []
+    count = 0
 
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        async for event in client.run_stream(
+    async with _open_client(config) as client:
+        stream = client.run_stream(
             objective=objective,
             agent=agent_handle,
-            user_id=user_id,
-        ):
-            event_data = {
-                "event_type": event.event_type,
-                "payload": event.payload,
-            }
-            events.append(event_data)
-
-            # Break on completion or error
-            if event.event_type in ("run_completed", "run_error"):
-                break
-
-    return events
-
-
-async def auto_route(objective: str) -> Dict[str, Any]:
+            user_id=config.user_id,
+        ).__aiter__()
+
+        try:
+            while True:
+                try:
+                    # Bound the wait for each event so a stalled run can't hang the CLI
+                    event = await asyncio.wait_for(
+                        stream.__anext__(), timeout=config.stream_timeout
+                    )
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise asyncio.TimeoutError(
+                        f"timeout after {config.stream_timeout:g}s waiting for an event"
+                    ) from None
+
+                event_data = {
+                    "event_type": event.event_type,
+                    "payload": event.payload,
+                }
+                count += 1
+                if collect:
+                    events.append(event_data)
+                else:
+                    out(event_data)
+
+                # Break on completion or error
+                if event.event_type in ("run_completed", "run_error"):
+                    break
+        finally:
+            # Close the stream while the client is still open, rather than
+            # leaving the generator to be finalized at loop shutdown
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    return events if collect else {"events": count}
+
+
+async def auto_route(config: Config, objective: str) -> Dict[str, Any]:
     """Let AIP platform automatically select the best agent."""
-    config = get_config()
-    user_id = f"user:{config['user_wallet']}"
-
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
+    async with _open_client(config) as client:
         result = await client.run(
             objective=objective,
-            user_id=user_id,
-            timeout=60.0,
+            user_id=config.user_id,
+            timeout=_RUN_TIMEOUT,
         )
 
         return {
@@ -153,72 +393,57 @@ async def auto_route(objective: str) -> Dict[str, Any]:
         }
 
 
-async def health_check() -> Dict[str, Any]:
+async def health_check(config: Config) -> Dict[str, Any]:
     """Check if AIP platform is available."""
-    config = get_config()
-
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        is_healthy = await client.health_check()
+    async with _open_client(config) as client:
+        is_healthy = await _bounded(config, client.health_check())
 
         return {
             "healthy": is_healthy,
-            "endpoint": config["aip_endpoint"],
+            "endpoint": config.aip_endpoint,
         }
 
 
-async def list_agents(limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+async def list_agents(
+    config: Config, limit: int = 100, offset: int = 0, ndjson: bool = False
+) -> Dict[str, Any]:
     """List agents owned by the current user.
 
     Note: This lists agents registered by the user, not all available agents.
     To call an agent, you need to know its handle (e.g., 'weather_public', 'calculator_private').
     """
-    config = get_config()
-    user_id = f"user:{config['user_wallet']}"
-
     try:
-        async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-            response = await client.list_user_agents(user_id, limit=limit, offset=offset)
-
-            agents = []
-            for agent in response.items:
-                agents.append({
-                    "agent_id": agent.agent_id,
-                    "handle": agent.handle,
-                    "name": agent.name,
-                    "description": agent.description,
-                    "price": agent.price,
-                    "capabilities": agent.capabilities,
-                    "on_chain": agent.on_chain,
-                    "identity_address": agent.identity_address,
-                })
+        async with _open_client(config) as client:
+            response = await _bounded(
+                config, client.list_user_agents(config.user_id, limit=limit, offset=offset)
+            )
+
+            if ndjson:
+                _emit_rows(_AGENT_KEYS, _agent_attrs, response.items)
+                return _page(response)
 
             return {
-                "agents": agents,
-                "total": response.total,
-                "limit": response.limit,
-                "offset": response.offset,
+                "agents": _rows(_AGENT_KEYS, _agent_attrs, response.items),
+                **_page(response),
             }
     except Exception as e:
         # If this endpoint is not available, return helpful message
         error_msg = str(e)
         if "502" in error_msg or "404" in error_msg:
-            return {
-                "agents": [],
+            page = {
                 "total": 0,
                 "limit": limit,
                 "offset": offset,
                 "note": "Agent discovery endpoint not available. Use call_agent with known handles like 'weather_public' or 'calculator_private'."
             }
+            return page if ndjson else {"agents": [], **page}
         raise
 
 
-async def get_agent_info(agent_id: str) -> Dict[str, Any]:
+async def get_agent_info(config: Config, agent_id: str) -> Dict[str, Any]:
     """Get detailed information about a specific agent."""
-    config = get_config()
-    user_id = f"user:{config['user_wallet']}"
-
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        agent = await client.get_agent(user_id, agent_id)
+    async with _open_client(config) as client:
+        agent = await _bounded(config, client.get_agent(config.user_id, agent_id))
 
         if not agent:
             cli_err(f"Agent not found: {agent_id}")
@@ -238,29 +463,36 @@ async def get_agent_info(agent_id: str) -> Dict[str, Any]:
         }
 
 
-async def list_runs(limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+async def list_runs(
+    config: Config, limit: int = 100, offset: int = 0, ndjson: bool = False
+) -> Dict[str, Any]:
     """List task execution history."""
-    config = get_config()
-    user_id = f"user:{config['user_wallet']}"
+    async with _open_client(config) as client:
+        response = await _bounded(
+            config, client.list_user_runs(config.user_id, limit=limit, offset=offset)
+        )
 
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        response = await client.list_user_runs(user_id, limit=limit, offset=offset)
+        if ndjson:
+            out_lines(response.items)
+            return _page(response)
 
         return {
             "runs": response.items,
-            "total": response.total,
-            "limit": response.limit,
-            "offset": response.offset,
+            **_page(response),
         }
 
 
-async def get_run_details(run_id: str) -> Dict[str, Any]:
+async def get_run_details(config: Config, run_id: str) -> Dict[str, Any]:
     """Get detailed information about a specific run including events and payments."""
-    config = get_config()
-
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        events = await client.get_run_events(run_id)
-        payments = await client.get_run_payments(run_id)
+    async with _open_client(config) as client:
+        # Events and payments are independent, so fetch them concurrently
+        events, payments = await _bounded(
+            config,
+            asyncio.gather(
+                client.get_run_events(run_id),
+                client.get_run_payments(run_id),
+            ),
+        )
 
         return {
             "run_id": run_id,
@@ -269,218 +501,265 @@ async def get_run_details(run_id: str) -> Dict[str, Any]:
         }
 
 
-async def get_agent_price(agent_id: str) -> Dict[str, Any]:
+async def get_agent_price(config: Config, agent_id: str) -> Dict[str, Any]:
     """Get pricing information for a specific agent."""
-    config = get_config()
-    user_id = f"user:{config['user_wallet']}"
+    async with _open_client(config) as client:
+        price_info = await _bounded(config, client.get_agent_price(config.user_id, agent_id))
 
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        price_info = await client.get_agent_price(user_id, agent_id)
+        return dict(zip(_PRICE_KEYS, _price_attrs(price_info)))
 
-        return {
-            "agent_id": price_info.identifier,
-            "amount": price_info.amount,
-            "currency": price_info.currency,
-            "metadata": price_info.metadata,
-        }
 
-
-async def list_agent_prices(limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+async def list_agent_prices(
+    config: Config, limit: int = 100, offset: int = 0, ndjson: bool = False
+) -> Dict[str, Any]:
     """List pricing for all agents."""
-    config = get_config()
-
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        response = await client.list_agent_prices(limit=limit, offset=offset)
+    async with _open_client(config) as client:
+        response = await _bounded(config, client.list_agent_prices(limit=limit, offset=offset))
 
-        prices = []
-        for price in response.items:
-            prices.append({
-                "agent_id": price.identifier,
-                "amount": price.amount,
-                "currency": price.currency,
-                "metadata": price.metadata,
-            })
+        if ndjson:
+            _emit_rows(_PRICE_KEYS, _price_attrs, response.items)
+            return _page(response)
 
         return {
-            "prices": prices,
-            "total": response.total,
-            "limit": response.limit,
-            "offset": response.offset,
+            "prices": _rows(_PRICE_KEYS, _price_attrs, response.items),
+            **_page(response),
         }
 
 
-async def register_agent(agent_config_json: str) -> Dict[str, Any]:
+async def register_agent(config: Config, agent_config_json: str) -> Dict[str, Any]:
     """Register a new agent."""
-    config = get_config()
-    user_id = f"user:{config['user_wallet']}"
-
     try:
         agent_config = json.loads(agent_config_json)
     except json.JSONDecodeError as e:
         cli_err(f"Invalid JSON: {e}")
 
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        result = await client.register_agent(user_id, agent_config)
+    async with _open_client(config) as client:
+        result = await _bounded(config, client.register_agent(config.user_id, agent_config))
         return result
 
 
-async def unregister_agent(agent_id: str) -> Dict[str, Any]:
+async def unregister_agent(config: Config, agent_id: str) -> Dict[str, Any]:
     """Unregister an agent."""
-    config = get_config()
-    user_id = f"user:{config['user_wallet']}"
-
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        result = await client.unregister_agent(user_id, agent_id)
+    async with _open_client(config) as client:
+        result = await _bounded(config, client.unregister_agent(config.user_id, agent_id))
         return result
 
 
-async def register_user(email: str = None) -> Dict[str, Any]:
+async def register_user(config: Config, email: str = None) -> Dict[str, Any]:
     """Register a new user."""
-    config = get_config()
-    wallet_address = config["user_wallet"]
+    wallet_address = config.user_wallet
 
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        result = await client.register_user(wallet_address, email=email)
+    async with _open_client(config) as client:
+        result = await _bounded(config, client.register_user(wallet_address, email=email))
         return result
 
 
-async def list_users(limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+async def list_users(
+    config: Config, limit: int = 100, offset: int = 0, ndjson: bool = False
+) -> Dict[str, Any]:
     """List all registered users."""
-    config = get_config()
-
-    async with AsyncAIPClient(base_url=config["aip_endpoint"]) as client:
-        response = await client.list_users(limit=limit, offset=offset)
+    async with _open_client(config) as client:
+        response = await _bounded(config, client.list_users(limit=limit, offset=offset))
 
-        users = []
-        for user in response.items:
-            users.append({
-                "user_id": user.user_id,
-                "wallet_address": user.wallet_address,
-                "email": user.email,
-                "created_at": user.created_at,
-            })
+        if ndjson:
+            _emit_rows(_USER_KEYS, _user_attrs, response.items)
+            return _page(response)
 
         return {
-            "users": users,
-            "total": response.total,
-            "limit": response.limit,
-            "offset": response.offset,
+            "users": _rows(_USER_KEYS, _user_attrs, response.items),
+            **_page(response),
         }
 
 
-# Tool handlers
+# Argument specs shared by the list_* tools
+_PAGING_ARGS = (
+    ("limit", {"type": int, "optional": True, "default": 100}),
+    ("offset", {"type": int, "optional": True, "default": 0}),
+    ("--ndjson", {}),
+)
+
+# Tool handlers, keyed by tool name. "args" are (name, spec) pairs whose
+# names match the handler's keyword parameters. Positionals are filled in
+# order; a spec may give a "type" to convert with and mark the argument
+# "optional" with a "default". Names starting with "--" are boolean flags.
 TOOLS = {
     "call_agent": {
-        "min_args": 2,
         "usage": 'call_agent "<agent_handle>" "<objective>"',
-        "handler": lambda args: call_agent(args[0], args[1]),
+        "handler": call_agent,
+        "args": (("agent_handle", {}), ("objective", {})),
     },
     "stream_agent": {
-        "min_args": 2,
-        "usage": 'stream_agent "<agent_handle>" "<objective>"',
-        "handler": lambda args: stream_agent(args[0], args[1]),
+        "usage": 'stream_agent "<agent_handle>" "<objective>" [--collect]',
+        "handler": stream_agent,
+        "args": (
+            ("agent_handle", {}),
+            ("objective", {}),
+            ("--collect", {}),
+        ),
     },
     "auto_route": {
-        "min_args": 1,
         "usage": 'auto_route "<objective>"',
-        "handler": lambda args: auto_route(args[0]),
+        "handler": auto_route,
+        "args": (("objective", {}),),
     },
     "health_check": {
-        "min_args": 0,
         "usage": "health_check",
-        "handler": lambda args: health_check(),
+        "handler": health_check,
+        "args": (),
     },
     "list_agents": {
-        "min_args": 0,
-        "usage": "list_agents [limit] [offset]",
-        "handler": lambda args: list_agents(
-            int(args[0]) if len(args) > 0 else 100,
-            int(args[1]) if len(args) > 1 else 0
-        ),
+        "usage": "list_agents [limit] [offset] [--ndjson]",
+        "handler": list_agents,
+        "args": _PAGING_ARGS,
     },
     "get_agent_info": {
-        "min_args": 1,
         "usage": 'get_agent_info "<agent_id>"',
-        "handler": lambda args: get_agent_info(args[0]),
+        "handler": get_agent_info,
+        "args": (("agent_id", {}),),
     },
     "list_runs": {
-        "min_args": 0,
-        "usage": "list_runs [limit] [offset]",
-        "handler": lambda args: list_runs(
-            int(args[0]) if len(args) > 0 else 100,
-            int(args[1]) if len(args) > 1 else 0
-        ),
+        "usage": "list_runs [limit] [offset] [--ndjson]",
+        "handler": list_runs,
+        "args": _PAGING_ARGS,
     },
     "get_run_details": {
-        "min_args": 1,
         "usage": 'get_run_details "<run_id>"',
-        "handler": lambda args: get_run_details(args[0]),
+        "handler": get_run_details,
+        "args": (("run_id", {}),),
     },
     "get_agent_price": {
-        "min_args": 1,
         "usage": 'get_agent_price "<agent_id>"',
-        "handler": lambda args: get_agent_price(args[0]),
+        "handler": get_agent_price,
+        "args": (("agent_id", {}),),
     },
     "list_agent_prices": {
-        "min_args": 0,
-        "usage": "list_agent_prices [limit] [offset]",
-        "handler": lambda args: list_agent_prices(
-            int(args[0]) if len(args) > 0 else 100,
-            int(args[1]) if len(args) > 1 else 0
-        ),
+        "usage": "list_agent_prices [limit] [offset] [--ndjson]",
+        "handler": list_agent_prices,
+        "args": _PAGING_ARGS,
     },
     "register_agent": {
-        "min_args": 1,
         "usage": 'register_agent "<agent_config_json>"',
-        "handler": lambda args: register_agent(args[0]),
+        "handler": register_agent,
+        "args": (("agent_config_json", {}),),
     },
     "unregister_agent": {
-        "min_args": 1,
         "usage": 'unregister_agent "<agent_id>"',
-        "handler": lambda args: unregister_agent(args[0]),
+        "handler": unregister_agent,
+        "args": (("agent_id", {}),),
     },
     "register_user": {
-        "min_args": 0,
         "usage": "register_user [email]",
-        "handler": lambda args: register_user(args[0] if len(args) > 0 else None),
+        "handler": register_user,
+        "args": (("email", {"optional": True}),),
     },
     "list_users": {
-        "min_args": 0,
-        "usage": "list_users [limit] [offset]",
-        "handler": lambda args: list_users(
-            int(args[0]) if len(args) > 0 else 100,
-            int(args[1]) if len(args) > 1 else 0
-        ),
+        "usage": "list_users [limit] [offset] [--ndjson]",
+        "handler": list_users,
+        "args": _PAGING_ARGS,
     },
 }
 
+_TOOL_NAMES = frozenset(TOOLS)
 
-async def run_cli():
-    """Run CLI tool."""
-    if len(sys.argv) < 2:
-        cli_err("Usage: " + " | ".join(t["usage"] for t in TOOLS.values()))
 
-    tool = sys.argv[1]
-    args = sys.argv[2:]
+@functools.lru_cache(maxsize=1)
+def _usage_banner() -> str:
+    """Usage of every tool, joined only when an error needs to print it."""
+    return " | ".join(t["usage"] for t in TOOLS.values())
 
-    if tool not in TOOLS:
-        cli_err(f"Unknown tool: {tool}. Usage: " + " | ".join(t["usage"] for t in TOOLS.values()))
 
+def _parse_args(tool: str, args: List[str]) -> Dict[str, Any]:
+    """Parse a tool's arguments into handler keyword parameters.
+
+    Only the tool's literal flags (--ndjson, --collect) are options; every
+    other token fills the declared positionals in order, even if it starts
+    with '-'. Extra positional arguments are ignored.
+    """
     tool_info = TOOLS[tool]
+    flags = {name for name, _ in tool_info["args"] if name.startswith("--")}
+    positionals = [arg for arg in args if arg not in flags]
+
+    params: Dict[str, Any] = {}
+    missing = []
+    for name, spec in tool_info["args"]:
+        if name.startswith("--"):
+            params[name[2:]] = name in args
+        elif positionals:
+            value = positionals.pop(0)
+            convert = spec.get("type")
+            if convert is not None:
+                try:
+                    value = convert(value)
+                except ValueError:
+                    cli_err(
+                        f"argument {name}: invalid {convert.__name__} value: {value!r}. "
+                        f"Usage: {tool_info['usage']}"
+                    )
+            params[name] = value
+        elif spec.get("optional"):
+            params[name] = spec.get("default")
+        else:
+            missing.append(name)
+
+    if missing:
+        cli_err(
+            f"the following arguments are required: {', '.join(missing)}. "
+            f"Usage: {tool_info['usage']}"
+        )
+    return params
 
-    if len(args) < tool_info["min_args"]:
-        cli_err(f"Usage: {tool_info['usage']}")
 
+def dispatch(argv: List[str]) -> Callable[[], Awaitable[Any]]:
+    """Validate argv and return a factory for the selected tool's coroutine.
+
+    Usage errors exit here, before an event loop is ever created.
+    """
+    if not argv:
+        cli_err(f"Usage: {_usage_banner()}")
+
+    tool = argv[0]
+
+    if tool not in _TOOL_NAMES:
+        cli_err(f"Unknown tool: {tool}. Usage: {_usage_banner()}")
+
+    params = _parse_args(tool, argv[1:])
+    handler = TOOLS[tool]["handler"]
+
+    config = _load_config()
+    return lambda: handler(config, **params)
+
+
+async def run_cli(tool: str, factory: Callable[[], Awaitable[Any]]) -> None:
+    """Run a dispatched tool and print its result."""
     try:
-        result = await tool_info["handler"](args)
+        result = await factory()
         out(result)
+    except asyncio.TimeoutError as e:
+        cli_err(str(e) or "timeout", tool=tool)
     except Exception as e:
         cli_err(str(e))
 
 
+def _event_loop_runner() -> Callable[[Awaitable[Any]], Any]:
+    """Return uvloop.run when available, otherwise asyncio.run.
+
+    uvloop mainly helps the socket-heavy tools (stream_agent, list_*);
+    short calls such as health_check see no measurable difference.
+    """
+    if sys.platform != "win32":
+        try:
+            import uvloop
+        except ImportError:
+            pass
+        else:
+            return uvloop.run
+    return asyncio.run
+
+
 if __name__ == "__main__":
     try:
-        asyncio.run(run_cli())
+        factory = dispatch(sys.argv[1:])
+        _event_loop_runner()(run_cli(sys.argv[1], factory))
     except KeyboardInterrupt:
         cli_err("Interrupted by user")
     except Exception as e:
@@ -0,0 +1,228 @@
+"""Tests for the CLI in scripts/index.py."""
+
+import asyncio
+import importlib.util
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location(
+    "index", Path(__file__).parent.parent / "scripts" / "index.py"
+)
+index = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(index)
+
+
+def make_config(**overrides):
+    values = {
+        "aip_endpoint": "http://aip.test",
+        "user_wallet": "0xabc",
+        "user_id": "user:0xabc",
+        "membase_account": None,
+        "membase_secret_key": None,
+        "timeout": 30.0,
+        "stream_timeout": 60.0,
+    }
+    values.update(overrides)
+    return index.Config(**values)
+
+
+def read_lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+class FakeClient:
+    """Stand-in for AsyncAIPClient returning canned responses."""
+
+    agents = []
+    events = []
+    stream_closed = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def list_user_agents(self, user_id, limit, offset):
+        return SimpleNamespace(items=self.agents, total=len(self.agents), limit=limit, offset=offset)
+
+    async def run_stream(self, objective, agent, user_id):
+        try:
+            for event in self.events:
+                if event is None:
+                    await asyncio.sleep(10)
+                yield event
+        finally:
+            FakeClient.stream_closed = True
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    monkeypatch.setattr(FakeClient, "agents", [])
+    monkeypatch.setattr(FakeClient, "events", [])
+    monkeypatch.setattr(FakeClient, "stream_closed", False)
+    monkeypatch.setattr(index, "_load_client", lambda: FakeClient)
+    return FakeClient
+
+
+def agent(agent_id):
+    return SimpleNamespace(
+        agent_id=agent_id,
+        handle=f"{agent_id}_public",
+        name=agent_id.title(),
+        description="",
+        price=10**20,
+        capabilities=[],
+        on_chain=False,
+        identity_address=None,
+    )
+
+
+def event(event_type):
+    return SimpleNamespace(event_type=event_type, payload={})
+
+
+# Argument parsing
+
+
+@pytest.mark.parametrize(
+    "args, objective",
+    [
+        (["x", "--"], "--"),
+        (["x", "--", "extra"], "--"),
+        (["x", "-foo"], "-foo"),
+        (["x", "obj", "extra"], "obj"),
+    ],
+)
+def test_positionals_are_taken_verbatim(args, objective):
+    params = index._parse_args("call_agent", args)
+    assert params == {"agent_handle": "x", "objective": objective}
+
+
+def test_paging_defaults_and_conversion():
+    assert index._parse_args("list_agents", []) == {"limit": 100, "offset": 0, "ndjson": False}
+    assert index._parse_args("list_agents", ["--ndjson", "5", "-1"]) == {
+        "limit": 5,
+        "offset": -1,
+        "ndjson": True,
+    }
+
+
+def test_flags_only_apply_to_tools_that_declare_them():
+    params = index._parse_args("call_agent", ["x", "--ndjson"])
+    assert params == {"agent_handle": "x", "objective": "--ndjson"}
+
+
+def test_optional_positional_defaults_to_none():
+    assert index._parse_args("register_user", []) == {"email": None}
+
+
+def test_invalid_int_reports_argument(capsys):
+    with pytest.raises(SystemExit) as exc:
+        index._parse_args("list_runs", ["ten"])
+    assert exc.value.code == 1
+    (error,) = read_lines(capsys)
+    assert error["error"].startswith("argument limit: invalid int value: 'ten'.")
+
+
+def test_missing_arguments_are_listed(capsys):
+    with pytest.raises(SystemExit):
+        index._parse_args("call_agent", [])
+    (error,) = read_lines(capsys)
+    assert error["error"].startswith(
+        "the following arguments are required: agent_handle, objective."
+    )
+
+
+# NDJSON output
+
+
+@pytest.mark.asyncio
+async def test_list_agents_ndjson(fake_client, capsys):
+    fake_client.agents = [agent("a"), agent("b")]
+
+    envelope = await index.list_agents(make_config(), limit=2, ndjson=True)
+
+    rows = read_lines(capsys)
+    assert [row["agent_id"] for row in rows] == ["a", "b"]
+    assert rows[0]["price"] == 10**20
+    assert envelope == {"total": 2, "limit": 2, "offset": 0}
+
+
+@pytest.mark.asyncio
+async def test_stream_agent_writes_events_then_count(fake_client, capsys):
+    fake_client.events = [event("agent_invoked"), event("run_completed"), event("ignored")]
+
+    result = await index.stream_agent(make_config(), "a", "obj")
+
+    assert [line["event_type"] for line in read_lines(capsys)] == [
+        "agent_invoked",
+        "run_completed",
+    ]
+    assert result == {"events": 2}
+
+
+@pytest.mark.asyncio
+async def test_stream_agent_without_events(fake_client, capsys):
+    assert await index.stream_agent(make_config(), "a", "obj") == {"events": 0}
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.asyncio
+async def test_stream_agent_collect(fake_client, capsys):
+    fake_client.events = [event("run_completed")]
+
+    result = await index.stream_agent(make_config(), "a", "obj", collect=True)
+
+    assert result == [{"event_type": "run_completed", "payload": {}}]
+    assert capsys.readouterr().out == ""
+
+
+# Timeouts
+
+
+@pytest.mark.asyncio
+async def test_bounded_times_out_with_message():
+    with pytest.raises(asyncio.TimeoutError, match="timeout after 0.01s"):
+        await index._bounded(make_config(timeout=0.01), asyncio.sleep(1))
+
+
+@pytest.mark.asyncio
+async def test_stream_event_timeout_closes_stream(fake_client):
+    fake_client.events = [event("agent_invoked"), None]
+
+    with pytest.raises(asyncio.TimeoutError, match="timeout after 0.01s waiting for an event"):
+        await index.stream_agent(make_config(stream_timeout=0.01), "a", "obj", collect=True)
+    assert fake_client.stream_closed
+
+
+@pytest.mark.asyncio
+async def test_run_cli_reports_timeout_with_tool(capsys):
+    async def hang():
+        await index._bounded(make_config(timeout=0.01), asyncio.sleep(1))
+
+    with pytest.raises(SystemExit):
+        await index.run_cli("health_check", hang)
+    assert read_lines(capsys) == [{"error": "timeout after 0.01s", "tool": "health_check"}]
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "nan", "inf", "soon"])
+def test_env_seconds_rejects_invalid(monkeypatch, capsys, value):
+    monkeypatch.setenv("AIP_TIMEOUT", value)
+    with pytest.raises(SystemExit):
+        index._env_seconds("AIP_TIMEOUT", 30.0)
+    (error,) = read_lines(capsys)
+    assert error["error"] == f"Invalid AIP_TIMEOUT: {value} (expected seconds > 0)"
+
+
+def test_env_seconds_default_and_override(monkeypatch):
+    monkeypatch.delenv("AIP_TIMEOUT", raising=False)
+    assert index._env_seconds("AIP_TIMEOUT", 30.0) == 30.0
+    monkeypatch.setenv("AIP_TIMEOUT", "2.5")
+    assert index._env_seconds("AIP_TIMEOUT", 30.0) == 2.5